@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+"""
+Compare bulk.parse_files(), with and without NumPy, against rfc.parse_file()
+on a generated corpus of C files.  Also time the search for token prefixes
+on its own, which is the only step NumPy speeds up.
+
+  $ python bench/bulk.py [files [lines_per_file]]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from comment_filter import bulk
+from comment_filter import language
+from comment_filter import reader
+from comment_filter import rfc
+
+FUNCTION = '''\
+/*
+ * Compute the total of f->values[0..n).
+ */
+static int compute_%(i)d(struct foo *f, int n)
+{
+    int i, total = 0;   // running total
+    char *p = f->name;
+
+    for (i = 0; i < n; i++) {
+        total += f->values[i] * 2;
+        if (total > LIMIT)
+            printf("overflow in %%s at %%d\\n", p, i);
+    }
+    while (*p && *p != ';')
+        p++;
+    return total / (n ? n : 1);
+}
+
+'''
+
+
+def make_corpus(d, files, lines):
+    paths = []
+    per_function = FUNCTION.count('\n')
+    for n in range(files):
+        path = os.path.join(d, 'f%d.c' % n)
+        with open(path, 'w') as f:
+            for i in range(lines // per_function):
+                f.write(FUNCTION % {'i': i})
+        paths.append(path)
+    return paths
+
+
+def run_parse_file(paths):
+    for path in paths:
+        with open(path, 'rb') as f:
+            lines = reader.split_lines(f.read().decode('utf-8'))
+        list(rfc.parse_file(language.c, lines))
+
+
+def run_bulk(paths):
+    for _ in bulk.parse_files(paths):
+        pass
+
+
+def run_candidates(paths):
+    buf = bytearray()
+    spans = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        spans.append((len(buf), len(buf) + len(data)))
+        buf += data
+    prefixes = bulk.token_prefixes([language.c])
+    start = time.time()
+    bulk.candidate_lines(buf, spans, prefixes)
+    return time.time() - start
+
+
+def timed(f, paths):
+    start = time.time()
+    f(paths)
+    return time.time() - start
+
+
+def main(files=20, lines=24000):
+    d = tempfile.mkdtemp()
+    try:
+        paths = make_corpus(d, files, lines)
+        print('%d files of %d lines' % (files, lines))
+        print('%-22s %8.3fs' % ('rfc.parse_file', timed(run_parse_file, paths)))
+        numpy = bulk.numpy
+        impls = [('numpy', numpy), ('pure Python', None)] if numpy else [('pure Python', None)]
+        try:
+            for name, module in impls:
+                bulk.numpy = module
+                print('%-22s %8.3fs' % ('bulk (%s)' % name, timed(run_bulk, paths)))
+                print('%-22s %8.3fs' % ('  token prefixes only', run_candidates(paths)))
+        finally:
+            bulk.numpy = numpy
+    finally:
+        shutil.rmtree(d)
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+"""
+Time the parser on deeply nested comments and report peak memory.
+
+  $ python bench/nested_comments.py [depth ...]
+"""
+
+import sys
+import timeit
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from comment_filter import language
+from comment_filter import rfc
+
+
+def one_line(depth):
+    return ['{-' * depth + ' a ' + '-}' * depth + '\n']
+
+
+def one_level_per_line(depth):
+    return ['{- a\n'] * depth + ['-}\n'] * depth
+
+
+def run(lines):
+    for _ in rfc.parse_file(language.haskell, lines):
+        pass
+
+
+def main(depths):
+    for depth in depths:
+        for name, make in [('one line', one_line), ('one level per line', one_level_per_line)]:
+            lines = make(depth)
+            secs = min(timeit.repeat(lambda: run(lines), number=1, repeat=3))
+            print('%-20s depth=%-8d %8.3fs' % (name, depth, secs))
+    if resource:
+        print('peak RSS: %d KiB' % resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+"""
+Measure the throughput of the server under concurrent clients, as under
+`make -jN`, against parsing each file in-process one after the other.
+Each client thread requests its share of a generated corpus of C files.
+With more workers than one, requests are parsed in parallel on as many
+cores as are available.
+
+  $ python bench/server.py [clients [files [lines_per_file]]]
+"""
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from comment_filter import client
+from comment_filter import language
+from comment_filter import reader
+from comment_filter import rfc
+from comment_filter import server
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bulk import make_corpus
+
+
+def run_in_process(paths):
+    for path in paths:
+        list(rfc.parse_file(language.c, reader.read_lines(path)))
+
+
+def run_server(socket_path, paths, clients):
+    def run(share):
+        for path in share:
+            client.request(socket_path, path=path)
+
+    threads = [threading.Thread(target=run, args=(paths[i::clients],)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def timed(f, *args):
+    start = time.time()
+    f(*args)
+    return time.time() - start
+
+
+def main(clients=8, files=64, lines=4000):
+    d = tempfile.mkdtemp()
+    try:
+        paths = make_corpus(d, files, lines)
+        print('%d clients, %d files of %d lines, %d cores' % (
+            clients, files, lines, multiprocessing.cpu_count()))
+        print('%-22s %8.3fs' % ('in-process', timed(run_in_process, paths)))
+        for workers in sorted(set([1, multiprocessing.cpu_count()])):
+            socket_path = os.path.join(d, 'comments.sock')
+            srv = server.Server(socket_path, workers)
+            t = threading.Thread(target=srv.serve_forever)
+            t.daemon = True
+            t.start()
+            try:
+                elapsed = timed(run_server, socket_path, paths, clients)
+            finally:
+                srv.shutdown()
+                srv.server_close()
+            print('%-22s %8.3fs' % ('server, %d worker%s' % (workers, 's' * (workers > 1)), elapsed))
+    finally:
+        shutil.rmtree(d)
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
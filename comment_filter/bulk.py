@@ -0,0 +1,209 @@
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+"""
+Filter many files at once.
+
+Files are read into one contiguous byte buffer per batch, and the first
+two bytes of every token are located up front.  Only lines containing one
+are handed to the parser; the output for every other line follows from the
+parser state alone.
+
+NumPy is used to locate the token prefixes if it is installed, otherwise a
+pure-Python scan produces the same result.
+"""
+
+import os
+import re
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import language
+from . import reader
+from . import rfc
+
+_line_re = re.compile(b'[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+')
+
+
+def token_prefixes(langs):
+    """
+    Return the first two bytes of every token in langs.  A line that
+    contains none of them cannot contain a token.
+    """
+    prefixes = set()
+    for lang in langs:
+        tokens = [lang.line_comment, lang.string_literal_start, lang.string_literal2_start]
+        for start, end in lang.comment_bookends:
+            tokens += [start, end]
+        prefixes.update(tok[:2].encode('ascii') for tok in tokens if tok)
+    return sorted(prefixes)
+
+
+def candidate_lines(buf, spans, prefixes):
+    """
+    Return, for each (start, end) span of buf, a list with one bool per
+    line, True if that line contains any of prefixes.  Lines end after
+    b'\\r\\n', b'\\r' and b'\\n', or at the end of the span.
+    """
+    if numpy is None:
+        return _candidate_lines_py(buf, spans, prefixes)
+    return _candidate_lines_np(buf, spans, prefixes)
+
+
+def _candidate_lines_py(buf, spans, prefixes):
+    search = _prefix_re(prefixes).search
+    flags = []
+    for start, end in spans:
+        flags.append([bool(search(line)) for line in _line_re.findall(bytes(buf[start:end]))])
+    return flags
+
+
+def _candidate_lines_np(buf, spans, prefixes):
+    arr = numpy.frombuffer(buf, dtype=numpy.uint8)
+
+    # Mark the first byte of each occurrence of a prefix, using lookup
+    # tables indexed by single bytes and by pairs of bytes.
+    single = numpy.zeros(256, dtype=bool)
+    pair = numpy.zeros(256 * 256, dtype=bool)
+    for p in prefixes:
+        p = bytearray(p)
+        if len(p) == 1:
+            single[p[0]] = True
+        else:
+            pair[p[0] * 256 + p[1]] = True
+    found = single[arr]
+    if len(arr) > 1:
+        pairs = arr[:-1].astype(numpy.uint16)
+        pairs <<= 8
+        pairs |= arr[1:]
+        found[:-1] |= pair[pairs]
+
+    # Mark the last byte of each line: every '\n', and every '\r' not
+    # followed by '\n' in the same file.
+    eol = arr == ord('\r')
+    eol[:-1] &= arr[1:] != ord('\n')
+    for start, end in spans:
+        if end > start and buf[end - 1] == ord('\r'):
+            eol[end - 1] = True
+    eol |= arr == ord('\n')
+
+    # Number lines across the whole buffer.  A file that does not end with
+    # a newline shares a line number with the next file's first line, so
+    # such lines are checked again below.
+    newlines = numpy.flatnonzero(eol)
+    hits = numpy.zeros(len(newlines) + 1, dtype=bool)
+    hits[numpy.searchsorted(newlines, numpy.flatnonzero(found))] = True
+
+    search = _prefix_re(prefixes).search
+    flags = []
+    for start, end in spans:
+        lo, hi = numpy.searchsorted(newlines, [start, end])
+        unterminated = end > start and not eol[end - 1]
+        file_flags = hits[lo:hi + unterminated].tolist()
+        if file_flags and start > 0 and not eol[start - 1]:
+            first_end = newlines[lo] + 1 if lo < hi else end
+            file_flags[0] = bool(search(buf, start, first_end))
+        if unterminated:
+            last_start = newlines[hi - 1] + 1 if hi > lo else start
+            file_flags[-1] = bool(search(buf, last_start, end))
+        flags.append(file_flags)
+    return flags
+
+
+def _prefix_re(prefixes):
+    return re.compile(b'|'.join(re.escape(p) for p in prefixes))
+
+
+def parse_lines(lang, lines, flags, code_only=False, keep_tokens=True):
+    """
+    Same as rfc.parse_file(), but only lines whose flag is True are passed
+    to the parser.  Lines without a flag must not contain any token.
+    """
+    state = rfc.State()
+    for line, flag in zip(lines, flags):
+        if flag:
+            state.line = line
+            line, state = rfc.parse_line(lang, state, code_only, keep_tokens)
+            yield line
+        elif state.in_multiline():
+            # The whole line is comment.
+            yield rfc.clear_line(line) if code_only else line
+        else:
+            # The whole line is code or string literal.
+            yield line if code_only else rfc.clear_line(line)
+
+
+def parse_files(paths, lang=None, code_only=False, keep_tokens=True,
+                encoding='utf-8', batch_size=64 * 1024 * 1024, on_error=None):
+    """
+    Return a generator that yields a (path, filtered_lines) pair for each
+    path in paths.  A file that cannot be read or decoded is skipped and
+    passed, with the exception, to on_error(path, exc) if given.
+
+    The filtered lines are identical to those of rfc.parse_file() given
+    the lines of the decoded file, as split by reader.read_lines().
+
+    Args:
+      paths (iterator<string>):
+        The files to parse.
+      lang (Language, default: None):
+        Syntax description for the language being parsed.  If None, the
+        language is chosen by each file's extension.
+      code_only (bool, default: False):
+        If False, each non-comment character is replaced with a space.
+        If True, each comment character is replaced with a space.
+      keep_tokens (bool, default: True):
+        If False, comment tokens are filtered out.
+        If True, comment tokens are preserved.
+      encoding (string, default: 'utf-8'):
+        The encoding of the files.  It must be ASCII-compatible.
+      batch_size (int, default: 64MiB):
+        Roughly how many bytes to read before parsing.
+      on_error (function, default: None):
+        Called with the path and the exception for each skipped file.
+
+    Returns:
+      iterator<(string, list<string>)>
+    """
+    batch = []
+    buf = bytearray()
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except EnvironmentError as e:
+            if on_error is not None:
+                on_error(path, e)
+            continue
+        batch.append((path, len(buf), len(buf) + len(data)))
+        buf += data
+        if len(buf) >= batch_size:
+            for result in _parse_batch(batch, buf, lang, code_only, keep_tokens, encoding, on_error):
+                yield result
+            batch = []
+            buf = bytearray()
+    for result in _parse_batch(batch, buf, lang, code_only, keep_tokens, encoding, on_error):
+        yield result
+
+
+def _lang_of(path):
+    _, ext = os.path.splitext(path)
+    return language.extension_to_lang_map.get(ext, language.c)
+
+
+def _parse_batch(batch, buf, lang, code_only, keep_tokens, encoding, on_error):
+    langs = [lang or _lang_of(path) for path, start, end in batch]
+    prefixes = token_prefixes(set(langs))
+    flags = candidate_lines(buf, [(start, end) for path, start, end in batch], prefixes)
+    for (path, start, end), file_lang, file_flags in zip(batch, langs, flags):
+        try:
+            text = bytes(buf[start:end]).decode(encoding)
+        except UnicodeDecodeError as e:
+            if on_error is not None:
+                on_error(path, e)
+            continue
+        lines = reader.split_lines(text)
+        yield path, list(parse_lines(file_lang, lines, file_flags, code_only, keep_tokens))
@@ -0,0 +1,106 @@
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+from . import bulk
+from . import language
+from . import reader
+from . import rfc
+import io
+import os
+
+import pytest
+
+
+SOURCES = {
+    'a.c': u'/* a\n still a */ int x; // b\nint y = "/*";\n"unterminated \\\n // c */\n',
+    'b.hs': u'main = 1 {- a {- b -}\n c -} -- d\nx\n',
+    'c.py': u'x = 1\n"""\ndoc\n"""\n# comment',
+    'd.c': u'',
+    'e.c': u'été /* é */\r\nno tokens here\r\n/*\r\nplain\r\n*/\r\n',
+    'f.lua': u'--[[ a\nb\n--]]\n',
+    'g.c': u'int x; // a\rint y;\r/* b\rc */ d\r',
+    'h.c': u'\n// e\r\n',
+}
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def impl(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(bulk, 'numpy', None)
+    return request.param
+
+
+@pytest.fixture
+def paths(tmpdir):
+    result = []
+    for name in sorted(SOURCES):
+        path = os.path.join(str(tmpdir), name)
+        with io.open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(SOURCES[name])
+        result.append(path)
+    return result
+
+
+def expected(path, code_only=False, keep_tokens=True):
+    lang = bulk._lang_of(path)
+    lines = reader.split_lines(SOURCES[os.path.basename(path)])
+    return list(rfc.parse_file(lang, lines, code_only, keep_tokens))
+
+
+def test_token_prefixes():
+    assert bulk.token_prefixes([language.c]) == [b'"', b"'", b'*/', b'/*', b'//', b';;']
+    assert bulk.token_prefixes([language.ruby]) == [b'"', b'#', b"'", b'=b', b'=e']
+
+
+def test_candidate_lines(impl):
+    buf = bytearray(b'a\n/* b\nc')
+    assert bulk.candidate_lines(buf, [(0, 4), (4, 8)], [b'/*']) == [[False, True], [False, False]]
+    assert bulk.candidate_lines(buf, [(0, 8)], [b'b', b'c']) == [[False, True, True]]
+    assert bulk.candidate_lines(buf, [(0, 8)], [b'*/', b'a/']) == [[False, False, False]]
+    assert bulk.candidate_lines(bytearray(b'x;y;;\n*p;\n'), [(0, 10)], [b';;']) == [[True, False]]
+    assert bulk.candidate_lines(bytearray(), [(0, 0)], [b'/*']) == [[]]
+
+
+def test_candidate_lines_cr(impl):
+    buf = bytearray(b'a\r/* b\r\nc\r\n')
+    assert bulk.candidate_lines(buf, [(0, 11)], [b'/*']) == [[False, True, False]]
+    assert bulk.candidate_lines(buf, [(0, 7), (7, 11)], [b'/*']) == [[False, True], [False, False]]
+    assert bulk.candidate_lines(buf, [(0, 7), (7, 11)], [b'c']) == [[False, False], [False, True]]
+
+
+@pytest.mark.parametrize('code_only', [False, True])
+@pytest.mark.parametrize('keep_tokens', [False, True])
+def test_parse_files(impl, paths, code_only, keep_tokens):
+    results = list(bulk.parse_files(paths, code_only=code_only, keep_tokens=keep_tokens))
+    assert [path for path, lines in results] == paths
+    for path, lines in results:
+        assert lines == expected(path, code_only, keep_tokens)
+
+
+def test_parse_files_in_batches(impl, paths):
+    results = list(bulk.parse_files(paths, batch_size=1))
+    assert [lines for path, lines in results] == [expected(path) for path in paths]
+
+
+def test_parse_files_with_lang(impl, paths):
+    c_path = [p for p in paths if p.endswith('b.hs')]
+    results = list(bulk.parse_files(c_path, lang=language.c))
+    lines = reader.split_lines(SOURCES['b.hs'])
+    assert results[0][1] == list(rfc.parse_file(language.c, lines))
+
+
+def test_parse_files_skips_failing_files(impl, paths, tmpdir):
+    bad = os.path.join(str(tmpdir), 'bad.c')
+    with open(bad, 'wb') as f:
+        f.write(b'// \xff\n')
+    missing = os.path.join(str(tmpdir), 'missing.c')
+    errors = []
+    results = list(bulk.parse_files([missing, bad] + paths, batch_size=1024,
+                                    on_error=lambda p, e: errors.append((p, e))))
+    assert [path for path, lines in results] == paths
+    assert [lines for path, lines in results] == [expected(path) for path in paths]
+    assert [p for p, e in errors] == [missing, bad]
+    assert isinstance(errors[0][1], EnvironmentError)
+    assert isinstance(errors[1][1], UnicodeDecodeError)
@@ -0,0 +1,50 @@
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+"""
+Client for `comment_filter.server`.  It imports only what is
+needed to send a request, so that short-lived callers start quickly.
+"""
+
+import errno
+import json
+import os
+import socket
+
+
+def request(socket_path, path=None, content=None, lang_name=None,
+            code_only=False, keep_tokens=True):
+    """
+    Send one request to the server at socket_path and return the filtered
+    text.  Relative paths are resolved against the caller's working
+    directory.
+
+    Raises:
+      socket.error: If the server is not reachable or does not reply.
+      RuntimeError: If the server could not filter the input.
+    """
+    req = {'code_only': code_only, 'keep_tokens': keep_tokens}
+    if path is not None:
+        req['path'] = os.path.abspath(path)
+    if content is not None:
+        req['content'] = content
+    if lang_name is not None:
+        req['language'] = lang_name
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        f = sock.makefile('rwb')
+        f.write(json.dumps(req).encode('utf-8') + b'\n')
+        f.flush()
+        raw = f.readline()
+        f.close()
+    finally:
+        sock.close()
+
+    if not raw:
+        raise socket.error(errno.ECONNRESET, 'server closed the connection without replying')
+    resp = json.loads(raw.decode('utf-8'))
+    if 'error' in resp:
+        raise RuntimeError(resp['error'])
+    return resp['output']
@@ -0,0 +1,178 @@
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+"""
+Turn the output of rfc.parse_file() into one record per comment.
+
+Records are yielded as soon as each comment ends, so only the comment
+currently being read is held in memory.
+"""
+
+import re
+
+from . import rfc
+
+
+class Comment:
+    """A single comment found in the input."""
+    def __init__(self, kind, token, line, column, end_line, end_column, text,
+                 doc=False, matches=None):
+        # Either 'line' or 'block'.
+        self.kind = kind
+
+        # The token that starts the comment.
+        self.token = token
+
+        # Position of the first character of the start token.  Lines are
+        # numbered from 1, columns from 0.
+        self.line = line
+        self.column = column
+
+        # Position just past the end token.  For line comments, and for
+        # block comments left unterminated, the end of the last line.
+        self.end_line = end_line
+        self.end_column = end_column
+
+        # The comment text without its start and end tokens.
+        self.text = text
+
+        # True if the comment starts with one of the language's
+        # doc_comment_starts, such as Javadoc's '/**'.
+        self.doc = doc
+
+        # Maps each matcher name to its non-None result.
+        self.matches = matches or {}
+
+    def __eq__(self, x):
+        return self.kind == x.kind and self.token == x.token and self.line == x.line \
+            and self.column == x.column and self.end_line == x.end_line \
+            and self.end_column == x.end_column and self.text == x.text \
+            and self.doc == x.doc and self.matches == x.matches
+
+    def __repr__(self):
+        return 'Comment(%r, %r, %r, %r, %r, %r, %r, %r, %r)' % (
+            self.kind, self.token, self.line, self.column, self.end_line,
+            self.end_column, self.text, self.doc, self.matches)
+
+
+_todo_re = re.compile(r'\b(TODO|FIXME|XXX)\b(?:\(([^)]*)\))?')
+_license_re = re.compile(
+    r'SPDX-License-Identifier:'
+    r'|\bCopyright\s*(?:\(c\)|\xa9|\d{4})'
+    r'|\bLicensed under\b'
+    r'|\bGNU (?:Lesser |Library |Affero )?General Public License\b'
+    r'|\bPermission is hereby granted\b'
+    r'|\bRedistribution and use in source and binary forms\b',
+    re.IGNORECASE)
+
+
+def match_todo(text):
+    """
+    Return a list of (marker, owner) pairs, such as ('TODO', 'alice') for
+    'TODO(alice)'.  The owner is '' if none is given.
+    """
+    return [(m.group(1), m.group(2) or '') for m in _todo_re.finditer(text)] or None
+
+
+def match_license(text):
+    """
+    Return the first line of text that looks like part of a license header:
+    a copyright notice, an SPDX identifier or a well-known license grant.
+    """
+    for line in text.splitlines():
+        if _license_re.search(line):
+            return line.strip()
+    return None
+
+
+DEFAULT_MATCHERS = {
+    'todo': match_todo,
+    'license': match_license,
+}
+
+
+def extract_comments(lang, file_obj, matchers=None):
+    """
+    Return a generator that yields a Comment for each comment in file_obj.
+
+    Args:
+      lang (Language):
+        Syntax description for the language being parsed.
+      file_obj (iterator<string>):
+        An iterater that yields lines.
+      matchers (dict<string, function>, default: DEFAULT_MATCHERS):
+        Functions that are passed the text of each comment.  Each non-None
+        result is stored in Comment.matches under the matcher's name.
+
+    Returns:
+      iterator<Comment>
+    """
+    if matchers is None:
+        matchers = DEFAULT_MATCHERS
+
+    doc_starts = tuple(lang.doc_comment_starts)
+
+    def make_comment(kind, token, start, end, text):
+        matches = {}
+        for name, matcher in matchers.items():
+            m = matcher(text)
+            if m is not None:
+                matches[name] = m
+        doc = bool(doc_starts) and (token + text).startswith(doc_starts)
+        return Comment(kind, token, start[0], start[1], end[0], end[1], text, doc, matches)
+
+    # The comment boundaries are found by rfc's own comment parsers, run
+    # over the filtered lines, in which everything but comments is blank.
+    state = rfc.State()
+    start = None
+    start_token = end_token = None
+    parts = []
+    lineno = 0
+    line = ''
+
+    for lineno, line in enumerate(rfc.parse_file(lang, file_obj), 1):
+        n = len(line)
+        state.line = line
+        if state.in_multiline():
+            cmt, state = rfc.finish_multiline_comments(lang, state)
+            if state.in_multiline():
+                parts.append(cmt)
+                continue
+            parts.append(cmt[:len(cmt) - len(end_token)])
+            yield make_comment('block', start_token, start, (lineno, n - len(state.line)), ''.join(parts))
+            parts = []
+
+        while True:
+            rest = state.line.lstrip(' \r\n')
+            if not rest:
+                break
+            col = n - len(rest)
+            state.line = rest
+
+            cmt, state = rfc.parse_line_comment(lang, state)
+            if cmt:
+                sep = rfc.get_linesep(cmt)
+                text = cmt[len(lang.line_comment):len(cmt) - len(sep)]
+                yield make_comment('line', lang.line_comment, (lineno, col), (lineno, n - len(sep)), text)
+                break
+
+            cmt, state = rfc.parse_multiline_comment(lang, state)
+            if not cmt:
+                # Not a comment; parse_file() output should never get here.
+                state.line = rest[1:]
+                continue
+            for start_token, end_token in lang.comment_bookends:
+                if cmt.startswith(start_token):
+                    break
+            start = (lineno, col)
+            if state.in_multiline():
+                parts = [cmt[len(start_token):]]
+                break
+            text = cmt[len(start_token):len(cmt) - len(end_token)]
+            yield make_comment('block', start_token, start, (lineno, n - len(state.line)), text)
+
+    if state.in_multiline():
+        # Unterminated block comment.
+        text = ''.join(parts)
+        sep = rfc.get_linesep(text)
+        yield make_comment('block', start_token, start, (lineno, len(line) - len(sep)), text)
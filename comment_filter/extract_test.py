@@ -0,0 +1,105 @@
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+from . import extract
+from . import language
+from . import rfc
+from .extract import Comment
+
+try:
+    from cStringIO import StringIO
+except:
+    from io import StringIO
+
+
+def comments(lang, s, matchers={}):
+    return list(extract.extract_comments(lang, StringIO(s), matchers))
+
+
+def test_line_comment():
+    assert comments(language.c, 'a // b\n') == [Comment('line', '//', 1, 2, 1, 6, ' b')]
+    assert comments(language.c, '// b') == [Comment('line', '//', 1, 0, 1, 4, ' b')]
+    assert comments(language.c, '"//" x\n') == []
+
+
+def test_block_comment():
+    assert comments(language.c, 'a /* b */ c /**/\n') == [
+        Comment('block', '/*', 1, 2, 1, 9, ' b '),
+        Comment('block', '/*', 1, 12, 1, 16, '')]
+    assert comments(language.c, '/* a\r\n b */ // c\r\n') == [
+        Comment('block', '/*', 1, 0, 2, 5, ' a\r\n b '),
+        Comment('line', '//', 2, 6, 2, 10, ' c')]
+
+
+def test_nested_block_comment():
+    assert comments(language.haskell, '{- a {- b -} c -} d\n') == [
+        Comment('block', '{-', 1, 0, 1, 17, ' a {- b -} c ')]
+    assert comments(language.c, '/*/**/*/') == [Comment('block', '/*', 1, 0, 1, 6, '/*')]
+
+
+def test_comments_match_parser():
+    # Each record spans exactly its tokens and text in the parser's output,
+    # and together they cover every comment character.
+    sources = [
+        (language.c, 'a /* b /* c */ d */ e // f\n/* g\n * h */ "/*" i\n/* j'),
+        (language.java, '/* a /* b */ c */ d\n/* e\n/* f\n*/ g */ /**/\n'),
+        (language.haskell, '{- a {- b\nc -} d -} e -- f\n{-{-{--}-}-} {- g'),
+        (language.haskell, '{-' * 50 + ' a\n' + '-}' * 49 + ' -} b\n'),
+        (language.python, "x = 1  # a\n'''b\nc''' # d\n"),
+    ]
+    for lang, src in sources:
+        out = ''.join(rfc.parse_file(lang, StringIO(src)))
+        offsets = [0]
+        for line in out.splitlines(True):
+            offsets.append(offsets[-1] + len(line))
+
+        covered = list(out)
+        for c in comments(lang, src):
+            start = offsets[c.line - 1] + c.column
+            end = offsets[c.end_line - 1] + c.end_column
+            assert out[start:end].startswith(c.token + c.text)
+            covered[start:end] = ' ' * (end - start)
+        assert ''.join(covered).strip() == ''
+
+
+def test_unterminated_block_comment():
+    assert comments(language.c, 'x /* a\nb\n') == [Comment('block', '/*', 1, 2, 2, 1, ' a\nb\n')]
+
+
+def test_matchers():
+    src = ('/* Copyright (c) 2017 Foo\n'
+           ' * SPDX-License-Identifier: BSD-3-Clause */\n'
+           '/* Check the license key, see step (c) below. */\n'
+           'int x; // TODO(alice): fix, FIXME too\n')
+    cmts = comments(language.c, src, None)
+    assert [c.matches for c in cmts] == [
+        {'license': 'Copyright (c) 2017 Foo'},
+        {},
+        {'todo': [('TODO', 'alice'), ('FIXME', '')]}]
+
+
+def test_doc_comments():
+    def docs(lang, s):
+        return [c.doc for c in comments(lang, s)]
+
+    assert docs(language.c, '/** a */ /*! b */ /**/ /* c */\n') == [True, True, False, False]
+    assert docs(language.c, '/// a\n//! b\n// c\n') == [True, True, False]
+    assert docs(language.java, '//! a\n/** b */\n') == [False, True]
+    assert docs(language.python, '#!/usr/bin/env python\n"""Doc."""\n') == [False, True]
+    assert docs(language.haskell, '-- | a\n-- b\n{-| c -}\n') == [True, False, True]
+    assert docs(language.sql, '-- | a\n') == [False]
+
+
+def test_custom_matcher():
+    cmts = comments(language.python, '# hello\n', {'len': len})
+    assert cmts[0].matches == {'len': 6}
+
+
+def test_streaming():
+    def lines():
+        yield '// a\n'
+        yield '/* b\n'
+        raise AssertionError('read too far')
+
+    it = extract.extract_comments(language.c, lines(), {})
+    assert next(it) == Comment('line', '//', 1, 0, 1, 4, ' a')
@@ -0,0 +1,236 @@
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+"""
+A persistent, searchable index of the comments in a source tree.
+
+The index is an SQLite database holding one row per line of each comment,
+with its file, line and column, so that a search reports the line that
+matches.  A phrase split across two lines of a comment is not found.
+
+A search finds every line containing the term as a substring, ignoring
+case.  If SQLite has FTS5 with its trigram tokenizer, candidate lines are
+first looked up in a full-text index; the results are the same either way.
+
+Files are re-parsed only when their size or modification time changes and
+their contents hash differs from the indexed version.
+"""
+
+import errno
+import hashlib
+import os
+import sqlite3
+
+from . import extract
+from . import language
+from . import reader
+
+# Bumped whenever the meaning of the tables changes.  An index with another
+# version is rebuilt from scratch.
+_schema_version = 3
+
+_schema = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    line INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS comments_file_id ON comments(file_id);
+"""
+
+# Keep the full-text index in sync with the comments table.  The trigram
+# tokenizer indexes every three characters, so any substring can be found.
+_fts_schema = """
+CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+    text, content='comments', content_rowid='id', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS comments_ai AFTER INSERT ON comments BEGIN
+    INSERT INTO comments_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS comments_ad AFTER DELETE ON comments BEGIN
+    INSERT INTO comments_fts(comments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def source_files(root):
+    """
+    Return a generator that yields the path of each file under root with
+    an extension in language.extension_to_lang_map.
+    """
+    if os.path.isfile(root):
+        yield root
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for name in sorted(filenames):
+            if os.path.splitext(name)[1] in language.extension_to_lang_map:
+                yield os.path.join(dirpath, name)
+
+
+def file_hash(path, chunk_size=64 * 1024):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _comment_lines(lang, lines):
+    """
+    Yield (line, column, text) for each non-blank line of each comment.
+    The column is that of the first character after the start token.
+    """
+    for c in extract.extract_comments(lang, lines, {}):
+        col = c.column + len(c.token)
+        for k, text in enumerate(reader.split_lines(c.text)):
+            text = text.rstrip('\r\n')
+            if text.strip():
+                yield c.line + k, col, text
+            col = 0
+
+
+class Index:
+    """
+    Comment index stored in the SQLite database at db_path.  Unless create
+    is True, the database must already exist; otherwise an IOError is
+    raised.
+    """
+    def __init__(self, db_path, create=True):
+        if not create and not os.path.isfile(db_path):
+            raise IOError(errno.ENOENT, 'no comment index', db_path)
+        self.conn = sqlite3.connect(db_path)
+        # Each file is committed separately; don't wait on the disk for each.
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] != _schema_version:
+            self.conn.executescript(
+                'DROP TABLE IF EXISTS comments_fts;'
+                'DROP TABLE IF EXISTS comments;'
+                'DROP TABLE IF EXISTS files;'
+                'PRAGMA user_version = %d;' % _schema_version)
+        self.conn.executescript(_schema)
+        try:
+            self.conn.executescript(_fts_schema)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite was built without FTS5, or is older than 3.34.
+            self.fts = False
+
+    def close(self):
+        self.conn.close()
+
+    def update(self, paths, on_error=None):
+        """
+        Index each file in paths that is new or has changed since it was
+        last indexed.  Return the number of files parsed.  Files are stored
+        by absolute path, so the index may be updated from any directory.
+
+        Each file is committed on its own.  A file that cannot be read or
+        decoded is removed from the index and passed, with the exception,
+        to on_error(path, exc) if given; the remaining files are still
+        indexed.
+        """
+        parsed = 0
+        for path in paths:
+            path = os.path.abspath(path)
+            try:
+                with self.conn:
+                    if self._update_file(path):
+                        parsed += 1
+            except (EnvironmentError, ValueError) as e:
+                # ValueError covers UnicodeDecodeError.
+                with self.conn:
+                    row = self.conn.execute('SELECT id FROM files WHERE path = ?', (path,)).fetchone()
+                    if row:
+                        self._remove(row[0])
+                if on_error is not None:
+                    on_error(path, e)
+        return parsed
+
+    def _update_file(self, path):
+        st = os.stat(path)
+        row = self.conn.execute(
+            'SELECT id, mtime, size, hash FROM files WHERE path = ?',
+            (path,)).fetchone()
+        if row and row[1] == st.st_mtime and row[2] == st.st_size:
+            return False
+        digest = file_hash(path)
+        if row and row[3] == digest:
+            self.conn.execute('UPDATE files SET mtime = ?, size = ? WHERE id = ?',
+                              (st.st_mtime, st.st_size, row[0]))
+            return False
+        if row:
+            self._remove(row[0])
+        self._add(path, st, digest)
+        return True
+
+    def prune(self, root):
+        """
+        Remove files under root that no longer exist from the index.  Return
+        the number of files removed.
+        """
+        root = os.path.abspath(root)
+        prefix = root if root.endswith(os.sep) else root + os.sep
+        removed = 0
+        with self.conn:
+            rows = self.conn.execute(
+                'SELECT id, path FROM files WHERE path = ? OR substr(path, 1, ?) = ?',
+                (root, len(prefix), prefix)).fetchall()
+            for file_id, path in rows:
+                if not os.path.isfile(path):
+                    self._remove(file_id)
+                    removed += 1
+        return removed
+
+    def search(self, term):
+        """
+        Return a list of (path, line, column, text) for each comment line
+        that contains term, ignoring case.  Paths are absolute.  Lines are
+        numbered from 1, columns from 0.  The column is that of the match.
+        """
+        escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        like = '%' + escaped + '%'
+        # Trigrams can't find a term shorter than three characters.
+        if self.fts and len(term) >= 3:
+            # The full-text index narrows the candidates; LIKE confirms them.
+            query = ('SELECT path, line, col, comments.text FROM comments_fts'
+                     ' JOIN comments ON comments.id = comments_fts.rowid'
+                     ' JOIN files ON files.id = comments.file_id'
+                     " WHERE comments_fts MATCH ? AND comments.text LIKE ? ESCAPE '\\'"
+                     ' ORDER BY path, line, col')
+            args = ('"%s"' % term.replace('"', '""'), like)
+        else:
+            query = ('SELECT path, line, col, text FROM comments'
+                     ' JOIN files ON files.id = comments.file_id'
+                     " WHERE text LIKE ? ESCAPE '\\'"
+                     ' ORDER BY path, line, col')
+            args = (like,)
+        results = []
+        for path, line, col, text in self.conn.execute(query, args):
+            i = text.lower().find(term.lower())
+            results.append((path, line, col + max(i, 0), text))
+        return results
+
+    def _add(self, path, st, digest):
+        cur = self.conn.execute(
+            'INSERT INTO files (path, mtime, size, hash) VALUES (?, ?, ?, ?)',
+            (path, st.st_mtime, st.st_size, digest))
+        file_id = cur.lastrowid
+        lang = language.extension_to_lang_map.get(os.path.splitext(path)[1], language.c)
+        lines = reader.read_lines(path, max_line_length=None)
+        self.conn.executemany(
+            'INSERT INTO comments (file_id, line, col, text) VALUES (?, ?, ?, ?)',
+            ((file_id, line, col, text) for line, col, text in _comment_lines(lang, lines)))
+
+    def _remove(self, file_id):
+        self.conn.execute('DELETE FROM comments WHERE file_id = ?', (file_id,))
+        self.conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
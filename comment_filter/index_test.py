@@ -0,0 +1,167 @@
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+from . import index
+import os
+
+import pytest
+
+
+def write(path, s):
+    with open(path, 'w') as f:
+        f.write(s)
+
+
+@pytest.fixture
+def tree(tmpdir):
+    root = str(tmpdir.mkdir('src'))
+    write(os.path.join(root, 'a.c'), '/* GPL v2 */\nint x; // TODO(alice)\n')
+    write(os.path.join(root, 'b.py'), 'x = "GPL"  # MIT\n')
+    write(os.path.join(root, 'notes.txt'), 'GPL\n')
+    return root
+
+
+@pytest.fixture(params=[True, False])
+def idx(request, tmpdir):
+    i = index.Index(os.path.join(str(tmpdir), 'comments.db'))
+    i.fts = i.fts and request.param
+    yield i
+    i.close()
+
+
+def test_missing_index_not_created(tmpdir):
+    db = os.path.join(str(tmpdir), 'comments.db')
+    with pytest.raises(IOError):
+        index.Index(db, create=False)
+    assert not os.path.exists(db)
+    index.Index(db).close()
+    index.Index(db, create=False).close()
+
+
+def test_source_files(tree):
+    assert list(index.source_files(tree)) == [
+        os.path.join(tree, 'a.c'), os.path.join(tree, 'b.py')]
+
+
+def test_search(idx, tree):
+    a = os.path.join(tree, 'a.c')
+    b = os.path.join(tree, 'b.py')
+    assert idx.update(index.source_files(tree)) == 2
+    assert idx.search('GPL') == [(a, 1, 3, ' GPL v2 ')]
+    assert idx.search('TODO(alice)') == [(a, 2, 10, ' TODO(alice)')]
+    assert idx.search('mit') == [(b, 1, 13, ' MIT')]
+    assert idx.search('100%') == []
+
+
+def test_search_substrings(idx, tree):
+    a = os.path.join(tree, 'a.c')
+    write(a, '// Licensed under GPLv2\n// LGPL-2.1\n// 100 files\n// 100% done\n')
+    idx.update([a])
+    assert idx.search('GPL') == [(a, 1, 18, ' Licensed under GPLv2'), (a, 2, 4, ' LGPL-2.1')]
+    assert idx.search('LGPL') == [(a, 2, 3, ' LGPL-2.1')]
+    assert idx.search('GPLv2') == [(a, 1, 18, ' Licensed under GPLv2')]
+    assert idx.search('100%') == [(a, 4, 3, ' 100% done')]
+    assert idx.search('fil') == [(a, 3, 7, ' 100 files')]
+    assert idx.search('1_0') == []
+
+
+def test_search_reports_matching_line(idx, tree):
+    a = os.path.join(tree, 'a.c')
+    write(a, 'int x;\n/* first\n *   GPL here\n */\n')
+    idx.update([a])
+    assert idx.search('GPL') == [(a, 3, 5, ' *   GPL here')]
+    assert idx.search('first') == [(a, 2, 3, ' first')]
+
+
+def test_incremental_update(idx, tree):
+    a = os.path.join(tree, 'a.c')
+    assert idx.update(index.source_files(tree)) == 2
+    assert idx.update(index.source_files(tree)) == 0
+
+    # Touched but unchanged.
+    st = os.stat(a)
+    os.utime(a, (st.st_atime, st.st_mtime + 10))
+    assert idx.update(index.source_files(tree)) == 0
+
+    write(a, '// BSD\n')
+    os.utime(a, (st.st_atime, st.st_mtime + 20))
+    assert idx.update(index.source_files(tree)) == 1
+    assert idx.search('GPL') == []
+    assert idx.search('BSD') == [(a, 1, 3, ' BSD')]
+
+
+def test_prune(idx, tree):
+    idx.update(index.source_files(tree))
+    os.remove(os.path.join(tree, 'b.py'))
+    assert idx.prune(tree) == 1
+    assert idx.search('MIT') == []
+
+
+def test_prune_only_under_root(idx, tree):
+    sub = os.path.join(tree, 'sub')
+    os.mkdir(sub)
+    write(os.path.join(sub, 'c.c'), '// MIT\n')
+    idx.update(index.source_files(tree))
+    os.remove(os.path.join(tree, 'a.c'))
+    os.remove(os.path.join(sub, 'c.c'))
+    assert idx.prune(sub) == 1
+    assert [r[0] for r in idx.search('GPL')] == [os.path.join(tree, 'a.c')]
+    assert idx.prune(tree + os.sep) == 1
+
+
+def test_relative_paths_stored_absolute(idx, tree, monkeypatch):
+    monkeypatch.chdir(tree)
+    idx.update(['a.c'])
+    assert [r[0] for r in idx.search('GPL')] == [os.path.join(tree, 'a.c')]
+    assert idx.prune('.') == 0
+
+
+def test_update_skips_failing_files(idx, tree):
+    a = os.path.join(tree, 'a.c')
+    b = os.path.join(tree, 'b.py')
+    bad = os.path.join(tree, 'bad.c')
+    with open(bad, 'wb') as f:
+        f.write(b'// \xff\n')
+    broken = os.path.join(tree, 'broken.c')
+    os.symlink(os.path.join(tree, 'missing.c'), broken)
+
+    errors = []
+    assert idx.update(index.source_files(tree), lambda p, e: errors.append((p, e))) == 2
+    assert [p for p, e in errors] == [bad, broken]
+    assert isinstance(errors[0][1], UnicodeDecodeError)
+    assert isinstance(errors[1][1], EnvironmentError)
+    assert idx.search('GPL') == [(a, 1, 3, ' GPL v2 ')]
+    assert idx.search('MIT') == [(b, 1, 13, ' MIT')]
+
+
+def test_update_removes_file_that_starts_failing(idx, tree):
+    a = os.path.join(tree, 'a.c')
+    idx.update([a])
+    st = os.stat(a)
+    with open(a, 'wb') as f:
+        f.write(b'/* GPL \xff */\n')
+    os.utime(a, (st.st_atime, st.st_mtime + 10))
+    errors = []
+    assert idx.update([a], lambda p, e: errors.append(p)) == 0
+    assert errors == [a]
+    assert idx.search('GPL') == []
+
+
+def test_update_long_lines(idx, tree):
+    a = os.path.join(tree, 'a.c')
+    with open(a, 'w') as f:
+        f.write('int x; // GPL ' + 'x' * (2 * 1024 * 1024) + '\n')
+    assert idx.update([a]) == 1
+    assert [r[:3] for r in idx.search('GPL')] == [(a, 1, 10)]
+
+
+def test_old_schema_rebuilt(tmpdir, tree):
+    db = os.path.join(str(tmpdir), 'comments.db')
+    i = index.Index(db)
+    i.update(index.source_files(tree))
+    i.conn.execute('PRAGMA user_version = 1')
+    i.close()
+    i = index.Index(db)
+    assert i.search('GPL') == []
+    assert i.update(index.source_files(tree)) == 2
+    i.close()
@@ -2,17 +2,19 @@
 #  SPDX-License-Identifier: BSD-3-Clause
 
 class Lang:
-    def __init__(self, line_comment, comment_bookends, nested_comments):
+    def __init__(self, line_comment, comment_bookends, nested_comments, doc_comment_starts=()):
         self.line_comment = line_comment
         self.comment_bookends = comment_bookends
         self.nested_comments = nested_comments
+        self.doc_comment_starts = doc_comment_starts
         self.string_literal_start = '"'
         self.string_literal2_start = "'"
 
 c = Lang(
     line_comment='//',
     comment_bookends=[('/*', '*/'), (';;', ';;')],
-    nested_comments=False)
+    nested_comments=False,
+    doc_comment_starts=('/**', '/*!', '///', '//!'))
 
 assembly = Lang(
     line_comment=';',
@@ -27,12 +29,14 @@ sql = Lang(
 haskell = Lang(
     line_comment='--',
     comment_bookends=[('{-', '-}')],
-    nested_comments=True)
+    nested_comments=True,
+    doc_comment_starts=('-- |', '-- ^', '{-|', '{- |', '{-^', '{- ^'))
 
 python = Lang(
     line_comment='#',
     comment_bookends=[('"""', '"""'), ("'''", "'''")],
-    nested_comments=False)
+    nested_comments=False,
+    doc_comment_starts=('"""', "'''"))
 
 ruby = Lang(
     line_comment='#',
@@ -47,12 +51,14 @@ lua = Lang(
 perl = Lang(
     line_comment='#',
     comment_bookends=[("=pod", "=cut")],
-    nested_comments=False)
+    nested_comments=False,
+    doc_comment_starts=('=pod',))
 
 java = Lang(
     line_comment='//',
     comment_bookends=[('/*', '*/')],
-    nested_comments=True)
+    nested_comments=True,
+    doc_comment_starts=('/**',))
 
 go = c
 
@@ -0,0 +1,111 @@
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+"""
+Read lines for rfc.parse_file() using bounded memory.
+"""
+
+import io
+import re
+
+_eol_re = re.compile(b'\r\n|\r|\n')
+_line_re = re.compile(u'[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+')
+
+
+class LineTooLongError(ValueError):
+    """Raised when a line is longer than the reader's limit."""
+
+
+def split_lines(s):
+    """
+    Split a string after each '\\r\\n', '\\r' and '\\n', the same way as
+    read_lines().  Unlike str.splitlines(), no other character ends a line.
+    """
+    return _line_re.findall(s)
+
+
+def read_lines(path_or_file, encoding='utf-8', chunk_size=64 * 1024,
+               max_line_length=1024 * 1024):
+    """
+    Return a generator that yields each line of a file, including its
+    line separator.
+
+    Lines are split after '\\r\\n', '\\r' and '\\n'.  The file is read in
+    chunks of chunk_size bytes into a buffer that is reused, so memory use
+    does not depend on the size of the file.
+
+    Args:
+      path_or_file (string or binary file):
+        The path to read, or a binary file object supporting readinto().
+      encoding (string, default: 'utf-8'):
+        The encoding of the file.  It must be ASCII-compatible.
+      chunk_size (int, default: 64KiB):
+        How many bytes to read at a time.
+      max_line_length (int, default: 1MiB):
+        The longest line, in bytes, that may be read, or None for no limit.
+
+    Returns:
+      iterator<string>
+
+    Raises:
+      LineTooLongError: If a line is longer than max_line_length.
+    """
+    if hasattr(path_or_file, 'readinto'):
+        for line in _read_lines(path_or_file, encoding, chunk_size, max_line_length):
+            yield line
+    else:
+        with io.open(path_or_file, 'rb', buffering=0) as f:
+            for line in _read_lines(f, encoding, chunk_size, max_line_length):
+                yield line
+
+
+def _read_lines(f, encoding, chunk_size, max_line_length):
+    chunk = bytearray(chunk_size)
+    view = memoryview(chunk)
+
+    # The start of a line continued in the next chunk.
+    pending = bytearray()
+
+    def check(n):
+        if max_line_length is not None and n > max_line_length:
+            raise LineTooLongError('line exceeds %d bytes' % max_line_length)
+
+    while True:
+        n = f.readinto(chunk)
+        pos = 0
+
+        # A '\r' at the end of the previous chunk may have been half of '\r\n'.
+        if pending.endswith(b'\r'):
+            if n and chunk[0] == ord('\n'):
+                pending += b'\n'
+                pos = 1
+            check(len(pending))
+            yield pending.decode(encoding)
+            del pending[:]
+
+        if not n:
+            break
+
+        while True:
+            m = _eol_re.search(chunk, pos, n)
+            if not m:
+                break
+            end = m.end()
+            if pending or (end == n and chunk[end - 1] == ord('\r')):
+                pending += view[pos:end]
+                pos = end
+                if end == n and chunk[end - 1] == ord('\r'):
+                    break
+                check(len(pending))
+                yield pending.decode(encoding)
+                del pending[:]
+            else:
+                check(end - pos)
+                yield view[pos:end].tobytes().decode(encoding)
+                pos = end
+
+        pending += view[pos:n]
+        check(len(pending))
+
+    if pending:
+        yield pending.decode(encoding)
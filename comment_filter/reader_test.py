@@ -0,0 +1,52 @@
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+from . import language
+from . import reader
+from . import rfc
+import io
+import os
+
+import pytest
+
+
+def read(data, **kwargs):
+    return list(reader.read_lines(io.BytesIO(data), **kwargs))
+
+
+def test_line_endings():
+    assert read(b'') == []
+    assert read(b'a') == ['a']
+    assert read(b'a\nb\r\nc\rd') == ['a\n', 'b\r\n', 'c\r', 'd']
+    assert read(b'\r\r\n\n') == ['\r', '\r\n', '\n']
+
+
+def test_split_lines():
+    assert reader.split_lines(u'') == []
+    assert reader.split_lines(u'a\nb\r\nc\rd') == [u'a\n', u'b\r\n', u'c\r', u'd']
+    assert reader.split_lines(u'a\x0cb\x0b\x85\u2028\n') == [u'a\x0cb\x0b\x85\u2028\n']
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 64])
+def test_chunk_boundaries(chunk_size):
+    data = b'ab\r\ncd\r\ref\n\r\ng\xc3\xa9\r'
+    expected = [u'ab\r\n', u'cd\r', u'\r', u'ef\n', u'\r\n', u'g\xe9\r']
+    assert read(data, chunk_size=chunk_size) == expected
+
+
+def test_max_line_length():
+    assert read(b'abc\nde', chunk_size=2, max_line_length=4) == ['abc\n', 'de']
+    with pytest.raises(reader.LineTooLongError):
+        read(b'abcde\n', chunk_size=2, max_line_length=4)
+    with pytest.raises(reader.LineTooLongError):
+        read(b'abcdefgh', chunk_size=2, max_line_length=4)
+    assert read(b'abcdefgh\n', chunk_size=2, max_line_length=None) == ['abcdefgh\n']
+
+
+def test_read_path(tmpdir):
+    path = os.path.join(str(tmpdir), 'mac.c')
+    with open(path, 'wb') as f:
+        f.write(b'int x; /* a\r b */\r// c\r')
+    lines = list(reader.read_lines(path))
+    assert lines == ['int x; /* a\r', ' b */\r', '// c\r']
+    assert list(rfc.parse_file(language.c, lines)) == ['       /* a\r', ' b */\r', '// c\r']
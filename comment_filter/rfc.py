@@ -3,24 +3,68 @@
 
 import re
 
-class State:
+class State(object):
     """Parser State"""
     def __init__(self, line='', multi_end_stack=None, in_literal=None):
         # The remaining input.
         self.line = line
 
-        # A stack of end tokens for multi-line comments.  The token on the
-        # top of the stack is the expected end token for the most nested
-        # multi-line comment.
-        self.multi_end_stack = multi_end_stack or []
+        # The end tokens of the open multi-line comments, as a list of
+        # [end_token, depth] pairs.  The last pair holds the expected end
+        # token for the most nested multi-line comment.  Runs of the same
+        # end token are counted rather than repeated, so that deeply nested
+        # comments use constant memory.
+        self.multi_end_depths = []
+        for multi_end in multi_end_stack or []:
+            self.push_multi_end(multi_end)
 
         # If the parser is waiting on the end quote, in_literal will be
         # string the parser is waiting for.
         self.in_literal = in_literal
 
+    @property
+    def multi_end_stack(self):
+        """
+        A read-only tuple of end tokens for multi-line comments, one per
+        nesting level, innermost last.  Use push_multi_end() and
+        pop_multi_end() to modify it.
+        """
+        return tuple(end for end, depth in self.multi_end_depths for _ in range(depth))
+
+    def in_multiline(self):
+        """
+        Return True if the parser is within a multi-line comment.
+        """
+        return bool(self.multi_end_depths)
+
+    def multi_depth(self):
+        """
+        Return how deeply nested the parser is within multi-line comments.
+        """
+        return sum(depth for end, depth in self.multi_end_depths)
+
+    def top_multi_end(self):
+        """
+        Return the expected end token for the most nested multi-line comment.
+        """
+        return self.multi_end_depths[-1][0]
+
+    def push_multi_end(self, multi_end):
+        if self.multi_end_depths and self.multi_end_depths[-1][0] == multi_end:
+            self.multi_end_depths[-1][1] += 1
+        else:
+            self.multi_end_depths.append([multi_end, 1])
+
+    def pop_multi_end(self):
+        top = self.multi_end_depths[-1]
+        top[1] -= 1
+        if not top[1]:
+            self.multi_end_depths.pop()
+        return top[0]
+
     def __eq__(self, x):
         # Return True if all members are equal.
-        return self.line == x.line and self.multi_end_stack == x.multi_end_stack \
+        return self.line == x.line and self.multi_end_depths == x.multi_end_depths \
             and self.in_literal == x.in_literal
 
 
@@ -83,16 +127,16 @@ def parse_line(lang, state, code_only=False, keep_tokens=True):
             rest_of_decl = cnts
         else:
             rest_of_decl = clear_line(cnts)
-    elif state.multi_end_stack:
+    elif state.in_multiline():
         # If there is state, we assume it is because we have parsed
         # the start of a multiline comment, but haven't found the end.
-        cmt, state = finish_multiline_comment(lang, state, keep_tokens)
+        cmt, state = finish_multiline_comments(lang, state, keep_tokens)
         if code_only:
             rest_of_decl = clear_line(cmt)
         else:
             rest_of_decl = cmt
 
-    if state.in_literal or state.multi_end_stack:
+    if state.in_literal or state.in_multiline():
         return rest_of_decl, state
 
     decls, state = parse_declarations(lang, state, code_only, keep_tokens)
@@ -121,26 +165,23 @@ def parse_declarations(lang, state, code_only=False, keep_tokens=True):
     Returns:
       (string, State)
     """
-    code, state = parse_code(lang, state)
-    comment, state = parse_line_comment(lang, state, keep_tokens)
-    comment2, state = parse_multiline_comment(lang, state, keep_tokens)
+    parts = []
+    while True:
+        code, state = parse_code(lang, state)
+        comment, state = parse_line_comment(lang, state, keep_tokens)
+        comment2, state = parse_multiline_comment(lang, state, keep_tokens)
 
-    if comment or comment2:
-        line = state.line
-        if not state.multi_end_stack:
-            # Continue looking for declarations.
-            line, state = parse_declarations(lang, state, code_only, keep_tokens)
-        if code_only:
-            line = code + clear_line(comment) + clear_line(comment2) + line
-        else:
-            line = clear_line(code) + comment + comment2 + line
-        return line, state
-    else:
-        state.line = ''
         if code_only:
-            return code, state
+            parts += [code, clear_line(comment), clear_line(comment2)]
         else:
-            return clear_line(code), state
+            parts += [clear_line(code), comment, comment2]
+
+        if not (comment or comment2):
+            state.line = ''
+            return ''.join(parts), state
+        if state.in_multiline():
+            return ''.join(parts) + state.line, state
+        # Continue looking for declarations.
 
 
 def parse_code(lang, state):
@@ -305,7 +346,7 @@ def parse_multiline_comment(lang, state, keep_tokens=True):
     line = state.line
     for multi_start, multi_end in lang.comment_bookends:
         if line.startswith(multi_start):
-            state.multi_end_stack.append(multi_end)
+            state.push_multi_end(multi_end)
             state.line = line[len(multi_start):]
             cnts, state = finish_multiline_comment(lang, state, keep_tokens)
             if not keep_tokens:
@@ -318,6 +359,9 @@ def finish_multiline_comment(lang, state, keep_tokens=True):
     """
     Returns the rest of a multi-line comment at the beginning of state.line.
 
+    Nested comments are tracked by the depth counters in state rather than
+    by recursion, so arbitrarily deep nesting is safe.
+
     Args:
       lang (Language):
         Syntax description for the language being parsed.
@@ -330,29 +374,63 @@ def finish_multiline_comment(lang, state, keep_tokens=True):
     Returns:
       (string, State)
     """
-    cnts, state = parse_multiline_contents(lang, state)
-    multi_end = state.multi_end_stack[-1]
+    # The comment is finished once the parser leaves this nesting level.
+    depth = state.multi_depth()
+    parts = []
+    while True:
+        cnts, state = parse_multiline_contents(lang, state)
+        parts.append(cnts)
 
-    # Handle language supports nested comments.
-    if lang.nested_comments:
-        cmt, state = parse_multiline_comment(lang, state, keep_tokens)
-    else:
-        cmt = ''
+        line = state.line
+        if not line:
+            return ''.join(parts), state
+
+        # Handle language supports nested comments.
+        tok = None
+        if lang.nested_comments:
+            for multi_start, multi_end in lang.comment_bookends:
+                if line.startswith(multi_start):
+                    state.push_multi_end(multi_end)
+                    tok = multi_start
+                    break
+
+        if tok is None:
+            # parse_multiline_contents stopped at the end token.
+            tok = state.pop_multi_end()
+
+        state.line = line[len(tok):]
+        if not keep_tokens:
+            tok = ' ' * len(tok)
+        parts.append(tok)
+        if state.multi_depth() < depth:
+            return ''.join(parts), state
 
-    line = state.line
-    if line:
-        if line.startswith(multi_end):
-            i = len(multi_end)
-            state.multi_end_stack.pop()
-            state.line = line[i:]
-            if not keep_tokens:
-                multi_end = ' ' * len(multi_end)
-            return cnts + cmt + multi_end, state
-        else:
-            more_cnts, state = finish_multiline_comment(lang, state, keep_tokens)
-            return cnts + cmt + more_cnts, state
-    else:
-        return cnts + cmt, state
+
+def finish_multiline_comments(lang, state, keep_tokens=True):
+    """
+    Returns the rest of all open multi-line comments at the beginning of
+    state.line, up to and including the end token of the outermost one.
+    If the line ends first, the whole line is returned and the comments
+    remain open in state.
+
+    Args:
+      lang (Language):
+        Syntax description for the language being parsed.
+      state (State):
+        Parser state
+      keep_tokens (bool, default: True):
+        If False, comment tokens are filtered out.
+        If True, comment tokens are preserved.
+
+    Returns:
+      (string, State)
+    """
+    # Each call finishes one nesting level.
+    cmts = []
+    while state.in_multiline() and state.line:
+        cmt, state = finish_multiline_comment(lang, state, keep_tokens)
+        cmts.append(cmt)
+    return ''.join(cmts), state
 
 
 def parse_multiline_contents(lang, state):
@@ -370,7 +448,7 @@ def parse_multiline_contents(lang, state):
     """
     line = state.line
     tokens = [start for start, end in lang.comment_bookends]
-    multi_end = state.multi_end_stack[-1]
+    multi_end = state.top_multi_end()
     tokens.append(multi_end)
 
     if lang.nested_comments:
@@ -420,7 +498,7 @@ def get_linesep(line):
     n = len(line)
     if n >= 2 and line[-2:] == '\r\n':
         return '\r\n'
-    elif n >= 1 and line[-1] == '\n':
-        return '\n'
+    elif n >= 1 and line[-1] in '\r\n':
+        return line[-1]
     else:
         return ''
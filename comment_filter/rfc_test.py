@@ -6,6 +6,8 @@ from . import language
 from functools import reduce, wraps
 from sys import getrecursionlimit, setrecursionlimit
 
+import pytest
+
 try:
     from cStringIO import StringIO
 except:
@@ -29,16 +31,25 @@ def test_state():
     """
     Verify constructor doesn't return a global default value.
     """
-    rfc.State().multi_end_stack.append('doh!')
+    rfc.State().push_multi_end('doh!')
     assert(len(rfc.State().multi_end_stack) == 0)
 
 
+def test_multi_end_stack_is_read_only():
+    state = make_state('', ['*/'])
+    with pytest.raises(AttributeError):
+        state.multi_end_stack.append('doh!')
+    with pytest.raises(AttributeError):
+        state.multi_end_stack = []
+    assert state.multi_end_stack == ('*/',)
+
+
 def c_line(s):
     """
     Given a string, return only the C comments, and in the column same position.
     """
     line, state = safe_parse_line(language.c, make_state(s))
-    assert state.multi_end_stack == []
+    assert state.multi_end_stack == ()
     return line
 
 
@@ -47,7 +58,7 @@ def c_code(s):
     Given a string, return only the C code, and in the column same position.
     """
     line, state = safe_parse_line(language.c, make_state(s), code_only=True)
-    assert state.multi_end_stack == []
+    assert state.multi_end_stack == ()
     return line
 
 
@@ -56,7 +67,7 @@ def py_line(s):
     Given a string, return only the Python comments, and in the column same position.
     """
     line, state = safe_parse_line(language.python, make_state(s))
-    assert state.multi_end_stack == []
+    assert state.multi_end_stack == ()
     return line
 
 
@@ -66,7 +77,7 @@ def java_line(s):
     Unlike c_line, java_line supports nested comments.
     """
     line, state = safe_parse_line(language.java, make_state(s))
-    assert state.multi_end_stack == []
+    assert state.multi_end_stack == ()
     return line
 
 
@@ -111,6 +122,7 @@ def test_clear_line():
     assert rfc.clear_line('abc') == '   '
     assert rfc.clear_line('abc\n') == '   \n'  # Preserve newline.
     assert rfc.clear_line('abc\r\n') == '   \r\n'  # Preserve multibyte newline.
+    assert rfc.clear_line('abc\r') == '   \r'  # Preserve old Mac newline.
 
 
 def test_get_linesep():
@@ -118,6 +130,7 @@ def test_get_linesep():
     assert rfc.get_linesep('foo\n') == '\n'
     assert rfc.get_linesep('foo\r\n') == '\r\n'
     assert rfc.get_linesep('foo\r\nbar\n') == '\n'
+    assert rfc.get_linesep('foo\r') == '\r'
 
 
 def multiline_comment(lang, line, keep_tokens=True):
@@ -220,6 +233,63 @@ def test_previous_state_maintained():
     assert parse_line(j, '/*', ['foo']) == ('/*', make_state('', ['foo', '*/']))
 
 
+def test_state_counts_nesting():
+    state = make_state('', ['*/', '*/', '-}', '*/'])
+    assert state.multi_end_depths == [['*/', 2], ['-}', 1], ['*/', 1]]
+    assert state.multi_end_stack == ('*/', '*/', '-}', '*/')
+    assert state.multi_depth() == 4
+    assert state.pop_multi_end() == '*/'
+    assert state.top_multi_end() == '-}'
+
+
+def test_resumed_nested_multiline_comment():
+    h = language.haskell
+    assert parse_line(h, '-} -} x', ['-}', '-}']) == ('-} -}  ', make_state())
+    assert parse_line(h, '-} x', ['-}', '-}']) == ('-} x', make_state('', ['-}']))
+
+
+def test_finish_multiline_comments():
+    h = language.haskell
+    state = make_state(' a -} b -} c -}', ['-}', '-}'])
+    assert rfc.finish_multiline_comments(h, state) == (' a -} b -}', make_state(' c -}'))
+    state = make_state(' a {- b -}\n', ['-}'])
+    assert rfc.finish_multiline_comments(h, state) == (' a {- b -}\n', make_state('', ['-}']))
+
+
+def without_recursion(f):
+    """
+    Run f with a recursion limit too low for a recursive parser.
+    """
+    @wraps(f)
+    def wrapper():
+        limit = getrecursionlimit()
+        setrecursionlimit(200)
+        try:
+            f()
+        finally:
+            setrecursionlimit(limit)
+    return wrapper
+
+
+@without_recursion
+def test_deeply_nested_comments():
+    n = 5000
+    h = language.haskell
+    line, state = safe_parse_line(h, make_state('{-' * n + ' a ' + '-}' * n + ' x\n'))
+    assert line == '{-' * n + ' a ' + '-}' * n + '  \n'
+    assert state == make_state()
+
+    lines = ['{- a\n'] * n + ['-}\n'] * n + ['x\n']
+    out = list(rfc.parse_file(h, StringIO(''.join(lines))))
+    assert out == lines[:-1] + [' \n']
+
+
+@without_recursion
+def test_many_comments_on_one_line():
+    line = '/**/ x ' * 5000
+    assert c_line(line) == '/**/   ' * 5000
+
+
 def test_code_of_resumed_multiline_comment():
     c = language.c
     assert parse_line(c, 'a', ['*/'], True) == (' ', make_state('', ['*/']))
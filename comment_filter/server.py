@@ -0,0 +1,204 @@
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+"""
+A long-lived comment filter listening on a local Unix socket.
+
+Invoking the `comments` utility once per file pays for interpreter startup
+on every call.  A single server can instead answer any number of requests.
+Connections are read on threads, and requests are filtered by a fixed pool
+of worker processes, so that they are parsed in parallel despite the GIL.
+
+The protocol is newline-delimited JSON.  Each request is an object with
+either a 'path' or a 'content' member, and optionally 'language',
+'code_only' and 'keep_tokens'.  Each response is an object with either an
+'output' or an 'error' member.  A client may send any number of requests
+over one connection.
+"""
+
+import errno
+import json
+import multiprocessing
+import os
+import socket
+import stat
+import threading
+import time
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+from .client import request  # Re-exported for existing callers.
+from . import language
+from . import reader
+from . import rfc
+
+
+def lookup_lang(path=None, name=None):
+    """
+    Return the language named 'name', otherwise the language associated
+    with the extension of 'path', otherwise C.
+    """
+    if name:
+        lang = getattr(language, name, None)
+        if not isinstance(lang, language.Lang):
+            raise ValueError('unknown language: %s' % name)
+        return lang
+    _, ext = os.path.splitext(path or '')
+    return language.extension_to_lang_map.get(ext, language.c)
+
+
+def filter_request(req):
+    """
+    Return the filtered text for a decoded request object.
+    """
+    path = req.get('path')
+    content = req.get('content')
+    lang = lookup_lang(path, req.get('language'))
+    code_only = bool(req.get('code_only', False))
+    keep_tokens = bool(req.get('keep_tokens', True))
+
+    if content is not None:
+        lines = reader.split_lines(content)
+        return ''.join(rfc.parse_file(lang, lines, code_only, keep_tokens))
+    elif path is not None:
+        lines = reader.read_lines(path, max_line_length=None)
+        return ''.join(rfc.parse_file(lang, lines, code_only, keep_tokens))
+    else:
+        raise ValueError("request requires 'path' or 'content'")
+
+
+def _respond(req):
+    """
+    Return the response object for a decoded request.  Runs in a worker
+    process.
+    """
+    try:
+        return {'output': filter_request(req)}
+    except Exception as e:
+        return {'error': '%s: %s' % (type(e).__name__, e)}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        self.request.settimeout(self.server.idle_timeout)
+        socketserver.StreamRequestHandler.setup(self)
+
+    def handle(self):
+        try:
+            for raw in self.rfile:
+                if not raw.strip():
+                    continue
+                try:
+                    req = json.loads(raw.decode('utf-8'))
+                except ValueError as e:
+                    resp = {'error': '%s: %s' % (type(e).__name__, e)}
+                else:
+                    resp = self.server.respond(req)
+                self.wfile.write(json.dumps(resp).encode('utf-8') + b'\n')
+                self.wfile.flush()
+        except socket.timeout:
+            # Drop clients that stay idle.
+            pass
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server that reads requests on a thread per connection and
+    filters them on a fixed pool of worker processes, one request per job.
+    An idle client therefore never holds a worker.
+    """
+    daemon_threads = True
+    block_on_close = False
+
+    # Seconds a client may stay idle before it is disconnected.
+    idle_timeout = 60
+
+    # Seconds server_close() waits for jobs in progress to finish.
+    close_timeout = 5
+
+    def __init__(self, socket_path, workers=4):
+        remove_stale_socket(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path, _Handler)
+        self._pool = multiprocessing.Pool(workers)
+        self._closing = False
+        self._terminated = threading.Event()
+        self._busy = 0
+        self._idle = threading.Condition()
+
+    def respond(self, req):
+        """
+        Filter req on a worker process and return the response object.
+        """
+        with self._idle:
+            if self._closing:
+                return {'error': 'server is shutting down'}
+            self._busy += 1
+        try:
+            result = self._pool.apply_async(_respond, (req,))
+            while True:
+                try:
+                    return result.get(0.1)
+                except multiprocessing.TimeoutError:
+                    # Give up on jobs killed by server_close().
+                    if self._terminated.is_set():
+                        return {'error': 'server is shutting down'}
+        finally:
+            with self._idle:
+                self._busy -= 1
+                self._idle.notify_all()
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        with self._idle:
+            self._closing = True
+            deadline = time.time() + self.close_timeout
+            while self._busy and time.time() < deadline:
+                self._idle.wait(deadline - time.time())
+        self._terminated.set()
+        self._pool.terminate()
+        self._pool.join()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def remove_stale_socket(socket_path):
+    """
+    Remove the socket file left behind by a previous server, if any.
+    Refuses to remove anything that is not a socket.
+
+    Raises:
+      socket.error: If a server is still listening on socket_path.
+    """
+    try:
+        mode = os.stat(socket_path).st_mode
+    except OSError:
+        return
+    if not stat.S_ISSOCK(mode):
+        return
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except socket.error:
+        os.unlink(socket_path)
+        return
+    finally:
+        sock.close()
+    raise socket.error(errno.EADDRINUSE, 'a server is already listening on %s' % socket_path)
+
+
+def serve(socket_path, workers=4):
+    """
+    Serve requests on socket_path until interrupted.
+    """
+    server = Server(socket_path, workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
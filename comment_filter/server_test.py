@@ -0,0 +1,190 @@
+#  Copyright (c) 2017, Qualcomm Innovation Center, Inc. All rights reserved.
+#  SPDX-License-Identifier: BSD-3-Clause
+
+from . import _version
+from . import language
+from . import rfc
+from . import server
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def unused_path(tmpdir):
+    """
+    Return a path under tmpdir for a new Unix socket.  Some platforms limit
+    socket paths to 104 bytes, so a shorter directory is used if needed.
+    """
+    path = os.path.join(str(tmpdir), 'comments.sock')
+    if len(path) < 104:
+        yield path
+        return
+    d = tempfile.mkdtemp(dir='/tmp')
+    try:
+        yield os.path.join(d, 'comments.sock')
+    finally:
+        shutil.rmtree(d)
+
+
+@pytest.fixture
+def socket_path(unused_path):
+    srv = server.Server(unused_path, workers=2)
+    t = threading.Thread(target=srv.serve_forever)
+    t.daemon = True
+    t.start()
+    try:
+        yield unused_path
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def test_lookup_lang():
+    assert server.lookup_lang('foo.hs') is language.haskell
+    assert server.lookup_lang('foo.unknown') is language.c
+    assert server.lookup_lang('foo.c', 'python') is language.python
+    with pytest.raises(ValueError):
+        server.lookup_lang(None, 'extension_to_lang_map')
+
+
+def test_filter_request():
+    src = '/* a */ b\n// c\n'
+    expected = ''.join(rfc.parse_file(language.c, src.splitlines(True)))
+    assert server.filter_request({'content': src}) == expected
+    assert server.filter_request({'content': '# a\n', 'language': 'python',
+                                  'keep_tokens': False}) == '  a\n'
+    assert server.filter_request({'content': 'int x; // a\x0cb\n'}) == '       // a\x0cb\n'
+    with pytest.raises(ValueError):
+        server.filter_request({})
+
+
+def test_request_content(socket_path):
+    assert server.request(socket_path, content='x /* a */\n') == '  /* a */\n'
+    assert server.request(socket_path, content='x /* a */\n', code_only=True) == 'x        \n'
+
+
+def test_request_path(socket_path):
+    path = os.path.join(os.path.dirname(socket_path), 'hello.hs')
+    with open(path, 'w') as f:
+        f.write('main -- {- a -}\n')
+    assert server.request(socket_path, path=path) == '     -- {- a -}\n'
+
+
+def test_request_error(socket_path):
+    with pytest.raises(RuntimeError):
+        server.request(socket_path, path=os.path.join(os.path.dirname(socket_path), 'missing.c'))
+
+
+def test_concurrent_requests(socket_path):
+    results = [None] * 16
+
+    def run(i):
+        results[i] = server.request(socket_path, content='%d /* %d */\n' % (i, i))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(results))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for i, out in enumerate(results):
+        assert out == ''.join(rfc.parse_file(language.c, ['%d /* %d */\n' % (i, i)]))
+
+
+def idle_clients(socket_path, n):
+    clients = []
+    for _ in range(n):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+        clients.append(sock)
+    return clients
+
+
+def test_idle_clients_do_not_hold_workers(socket_path):
+    clients = idle_clients(socket_path, 4)
+    try:
+        assert server.request(socket_path, content='x // a\n') == '  // a\n'
+    finally:
+        for sock in clients:
+            sock.close()
+
+
+def test_close_with_idle_clients(unused_path):
+    srv = server.Server(unused_path, workers=1)
+    t = threading.Thread(target=srv.serve_forever)
+    t.daemon = True
+    t.start()
+    clients = idle_clients(unused_path, 2)
+    try:
+        start = time.time()
+        srv.shutdown()
+        srv.server_close()
+        assert time.time() - start < 2
+        assert not os.path.exists(unused_path)
+    finally:
+        for sock in clients:
+            sock.close()
+
+
+def test_second_server_refused(socket_path):
+    with pytest.raises(socket.error):
+        server.Server(socket_path)
+    assert server.request(socket_path, content='// a\n') == '// a\n'
+
+
+def test_stale_socket_removed(unused_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(unused_path)
+    sock.close()
+    server.Server(unused_path).server_close()
+    assert not os.path.exists(unused_path)
+
+
+def test_request_without_reply(unused_path):
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(unused_path)
+    listener.listen(1)
+
+    def hang_up():
+        conn, _ = listener.accept()
+        conn.recv(1024)
+        conn.close()
+
+    t = threading.Thread(target=hang_up)
+    t.daemon = True
+    t.start()
+    try:
+        with pytest.raises(socket.error):
+            server.request(unused_path, content='// a\n')
+        t.join()
+    finally:
+        listener.close()
+
+
+top_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_stdin(script, socket_path, stdin):
+    pythonpath = os.pathsep.join([top_dir] + [p for p in [os.environ.get('PYTHONPATH')] if p])
+    env = dict(os.environ, COMMENTS_SOCKET=socket_path, PYTHONPATH=pythonpath)
+    p = subprocess.Popen([sys.executable, os.path.join(top_dir, 'bin', script), '-'], env=env,
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = p.communicate(stdin)
+    return p.returncode, out, err
+
+
+def test_client_reads_stdin(socket_path):
+    assert run_stdin('comments-client', socket_path, b'int x; // hi\n') == (0, b'       // hi\n', b'')
+
+
+@pytest.mark.skipif(not hasattr(_version, '__version__'),
+                    reason='comment_filter._version is generated when released')
+def test_comments_reads_stdin(socket_path):
+    assert run_stdin('comments', socket_path, b'int x; // hi\n') == (0, b'       // hi\n', b'')
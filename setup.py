@@ -11,5 +11,6 @@ setup(
     url='https://source.codeaurora.org/external/qostg/comment-filter',
     version='1.0.0',
     packages=find_packages(),
-    scripts=['bin/comments']
+    extras_require={'numpy': ['numpy']},
+    scripts=['bin/comments', 'bin/comments-client']
 )